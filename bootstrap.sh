@@ -6,17 +6,19 @@ set -euo pipefail
 # - creates/uses .venv
 # - installs requirements
 # - (optionally) installs Playwright browsers if playwright is installed
-# - starts uvicorn
+# - starts gunicorn with uvicorn workers (see gunicorn.conf.py)
 
 APP_MODULE="${APP_MODULE:-main:app}"     # e.g. main:app
 HOST="${HOST:-0.0.0.0}"
 PORT="${PORT:-8006}"
 VENV_DIR="${VENV_DIR:-.venv}"
 REQ_FILE="${REQ_FILE:-requirements.txt}"
+WEB_CONCURRENCY="${WEB_CONCURRENCY:-1}"  # worker processes, each with its own model cache
 
 echo "==> Working dir: $(pwd)"
 echo "==> App module : ${APP_MODULE}"
 echo "==> Host/Port  : ${HOST}:${PORT}"
+echo "==> Workers    : ${WEB_CONCURRENCY}"
 
 echo "==> Updating apt + installing system deps (python venv, build tools)"
 export DEBIAN_FRONTEND=noninteractive
@@ -64,10 +66,6 @@ else
   echo "==> Playwright not installed; skipping browser install"
 fi
 
-echo "==> Starting uvicorn"
-exec uvicorn "${APP_MODULE}" \
-  --host "${HOST}" \
-  --port "${PORT}" \
-  --proxy-headers \
-  --forwarded-allow-ips "*" \
-  --timeout-keep-alive 120
+echo "==> Starting gunicorn (${WEB_CONCURRENCY} uvicorn workers)"
+export HOST PORT WEB_CONCURRENCY
+exec gunicorn "${APP_MODULE}" -c gunicorn.conf.py
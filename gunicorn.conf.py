@@ -0,0 +1,59 @@
+# gunicorn.conf.py
+#
+# Runs the FastAPI app as WEB_CONCURRENCY Uvicorn worker processes so requests
+# are spread across interpreters instead of contending for one GIL.
+#
+# Each worker has its own model cache, so RAM/VRAM use grows with the worker
+# count: that's the price of the extra concurrency. Workers are pinned to
+# GPUs round-robin through CUDA_VISIBLE_DEVICES.
+
+import os
+
+from uvicorn_worker import UvicornWorker
+
+
+class Worker(UvicornWorker):
+    # No websockets on this service; skip the Server/Date headers on every response.
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "ws": "none",
+        "server_header": False,
+        "date_header": False,
+    }
+
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = Worker
+forwarded_allow_ips = "*"
+# Long-lived keep-alive connections and a deep accept queue. All workers accept
+# from the one socket the master binds; reuse_port only sets SO_REUSEPORT on it
+# so a replacement master can bind the same port during a restart.
+keepalive = 75
+backlog = 2048
+reuse_port = True
+# A cold worker may spend a while loading a model before its first request.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+
+# GPUs to spread the workers over: the inherited CUDA_VISIBLE_DEVICES list, or
+# NUM_GPUS devices. Read once here, because pre_fork overwrites the variable.
+_visible_devices = os.getenv("CUDA_VISIBLE_DEVICES")
+if _visible_devices:
+    GPU_IDS = [d.strip() for d in _visible_devices.split(",") if d.strip()]
+else:
+    GPU_IDS = [str(i) for i in range(int(os.getenv("NUM_GPUS", "0")))]
+
+
+def pre_fork(server, worker):
+    # Runs in the master right before forking; the child inherits the env.
+    # Pick the GPU with the fewest live workers (not worker.age, which keeps
+    # counting up across restarts), so a replacement fills the slot that died.
+    if GPU_IDS:
+        load = {gpu: 0 for gpu in GPU_IDS}
+        for live in server.WORKERS.values():
+            gpu = getattr(live, "gpu_id", None)
+            if gpu in load:
+                load[gpu] += 1
+        worker.gpu_id = min(GPU_IDS, key=load.__getitem__)
+        os.environ["CUDA_VISIBLE_DEVICES"] = worker.gpu_id
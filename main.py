@@ -1,31 +1,345 @@
 # main.py
 
+import asyncio
+import bisect
+import hashlib
 import logging
+import math
 import os
+import re
+import tempfile
+import threading
 import time
+import urllib.request
 
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache, partial
+from typing import AsyncIterator, Callable, NamedTuple
+
+# One thread per native pool by default: with several Uvicorn workers plus CT2's
+# own threads, OpenMP/MKL/tokenizer pools would oversubscribe the box. Must be
+# set before torch / ctranslate2 / tokenizers are imported.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+import ctranslate2
+import fasttext
+import torch
 
 from easynmt import EasyNMT
-from fastapi import FastAPI
-from langdetect import detect, LangDetectException
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
+import msgspec
 import nltk
+import orjson
+import redis.asyncio as aioredis
 
 from fastapi import HTTPException
+from redis.exceptions import RedisError
 from starlette.concurrency import run_in_threadpool
+from transformers import AutoTokenizer, PreTrainedTokenizerBase
+from transformers.models.m2m_100.tokenization_m2m_100 import FAIRSEQ_LANGUAGE_CODES
 
 
 logging.basicConfig(level=logging.INFO)
 
 LOG = logging.getLogger(__name__)
 
+_UTC = timezone.utc
+
+def _cgroup_cpu_limit() -> int | None:
+    # cgroup v2 CPU quota ("<quota> <period>" or "max <period>"), e.g. docker --cpus.
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    return max(1, math.ceil(int(quota) / int(period)))
+
+def physical_cores() -> int:
+    """
+    Number of physical cores (SMT siblings counted once) among the CPUs this
+    process may run on, clamped by the cgroup CPU quota. Falls back to the
+    logical count.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        allowed = os.sched_getaffinity(0)
+    else:
+        allowed = set(range(os.cpu_count() or 1))
+    cores: set[tuple[str, str]] = set()
+    try:
+        with open("/proc/cpuinfo") as f:
+            processor, physical_id = -1, ""
+            for line in f:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "processor":
+                    processor = int(value)
+                elif key == "physical id":
+                    physical_id = value.strip()
+                elif key == "core id" and processor in allowed:
+                    cores.add((physical_id, value.strip()))
+    except (OSError, ValueError):
+        cores = set()
+    count = len(cores) or len(allowed)
+    limit = _cgroup_cpu_limit()
+    return min(count, limit) if limit else count
+
+# Split the physical cores between the Uvicorn workers for CT2's intra-op threads.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+CT2_INTRA_THREADS = max(1, physical_cores() // WEB_CONCURRENCY)
+# OMP_NUM_THREADS=1 would otherwise leave the EasyNMT (torch) fallback on one thread.
+torch.set_num_threads(CT2_INTRA_THREADS)
+
 DEFAULT_MODEL_NAME = "m2m_100_418M"
-MODEL_NAMES = {"m2m_100_418M", "m2m_100_1.2B"}
+
+# Pre-converted CTranslate2 models (see Dockerfile), keyed by public model name.
+CT2_MODEL_ROOT = os.getenv("CT2_MODEL_ROOT", "models")
+MODEL_NAMES = {
+    "m2m_100_418M": os.path.join(CT2_MODEL_ROOT, "m2m100_418M_ct2"),
+    "m2m_100_1.2B": os.path.join(CT2_MODEL_ROOT, "m2m100_1.2B_ct2"),
+    # Distilled 20-encoder / 2-decoder student of m2m_100_418M (same vocabulary).
+    # Not built by the image: convert it into this directory to enable it.
+    "m2m_100_418M_20_2": os.path.join(CT2_MODEL_ROOT, "m2m100_418M_20_2_ct2"),
+}
+# Language codes every m2m_100 model (and its distilled student) understands.
+SUPPORTED_LANGS = frozenset(FAIRSEQ_LANGUAGE_CODES["m2m100"])
+
+# Joined once for the "unknown model" error message.
+_MODEL_LIST_STR = ", ".join(sorted(MODEL_NAMES))
+# Models EasyNMT can load itself when there is no converted CTranslate2 copy.
+EASYNMT_MODELS = {"m2m_100_418M", "m2m_100_1.2B"}
+
+# Requests that don't name a model and are at most FAST_MODEL_MAX_CHARS characters
+# long go to the shallow-decoder model, when it's installed and
+# MAX_RESIDENT_MODELS leaves room for it next to the default model. Characters,
+# not whitespace words: Chinese, Japanese or Thai paragraphs have no spaces.
+FAST_MODEL_NAME = "m2m_100_418M_20_2"
+FAST_MODEL_MAX_CHARS = int(os.getenv("FAST_MODEL_MAX_CHARS", "160"))
+FAST_MODEL_AVAILABLE = os.path.isdir(MODEL_NAMES[FAST_MODEL_NAME])
+
+
+class CT2Model(NamedTuple):
+    """
+    CTranslate2 translator plus the m2m_100 tokenizer used for pre/post processing.
+    Exposes the same list-in/list-out ``translate`` shape as EasyNMT.
+    """
+
+    translator: ctranslate2.Translator
+    tokenizer: PreTrainedTokenizerBase
+
+    def _encode(self, text: str, source_lang: str) -> list[str]:
+        # Build the m2m_100 source sequence by hand ("__xx__ tokens </s>") instead of
+        # setting tokenizer.src_lang, which would mutate state shared across threads.
+        return [
+            self.tokenizer.get_lang_token(source_lang),
+            *self.tokenizer.tokenize(text),
+            self.tokenizer.eos_token,
+        ]
+
+    def _decode(self, tokens: list[str]) -> str:
+        ids = self.tokenizer.convert_tokens_to_ids(tokens)
+        return self.tokenizer.decode(ids, skip_special_tokens=True)
+
+    def translate_sentences(
+        self,
+        sentences: list[str],
+        source_lang: str,
+        target_lang: str,
+        beam_size: int = 1,
+        batch_size: int = 32,
+    ) -> list[str]:
+        if not sentences:
+            return []
+        target_prefix = [self.tokenizer.get_lang_token(target_lang)]
+        # asynchronous=True lets CT2 spread the batch over its own (GIL-free)
+        # translator threads; this thread then just waits and detokenises.
+        results = self.translator.translate_batch(
+            [self._encode(s, source_lang) for s in sentences],
+            target_prefix=[target_prefix] * len(sentences),
+            beam_size=beam_size,
+            max_batch_size=batch_size,
+            asynchronous=True,
+        )
+        # Drop the forced target-language token from each hypothesis.
+        return [self._decode(r.result().hypotheses[0][1:]) for r in results]
+
+    @staticmethod
+    def _split_documents(documents: list[str]) -> list[list[list[str]]]:
+        # Same splitting EasyNMT does: paragraphs on newlines, then NLTK sentences.
+        return [
+            [nltk.sent_tokenize(p) if p.strip() else [] for p in doc.split("\n")]
+            for doc in documents
+        ]
+
+    @staticmethod
+    def _join_documents(splits: list[list[list[str]]], translated: list[str]) -> list[str]:
+        it = iter(translated)
+        return [
+            "\n".join(" ".join(next(it) for _ in para) for para in doc)
+            for doc in splits
+        ]
+
+    def translate(
+        self,
+        documents: list[str],
+        source_lang: str,
+        target_lang: str,
+        beam_size: int = 1,
+        batch_size: int = 32,
+    ) -> list[str]:
+        splits = self._split_documents(documents)
+        sentences = [s for doc in splits for para in doc for s in para]
+        translated = self.translate_sentences(sentences, source_lang, target_lang, beam_size, batch_size)
+        return self._join_documents(splits, translated)
+
+    async def translate_async(
+        self,
+        documents: list[str],
+        source_lang: str,
+        target_lang: str,
+        executor: ThreadPoolExecutor,
+        beam_size: int = 1,
+        batch_size: int = 32,
+    ) -> list[str]:
+        # Sentence splitting and SentencePiece encoding are pure-Python work, so the
+        # whole prepare/submit/wait/decode cycle runs in one hop to the executor.
+        return await asyncio.get_running_loop().run_in_executor(
+            executor,
+            partial(
+                self.translate,
+                documents,
+                source_lang,
+                target_lang,
+                beam_size=beam_size,
+                batch_size=batch_size,
+            ),
+        )
+
+    async def translate_stream(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        on_finish: Callable[[], None],
+    ) -> AsyncIterator[str]:
+        """
+        Greedy-decode one document sentence by sentence, yielding text pieces as
+        tokens come out of CTranslate2. Concatenated, the pieces equal translate().
+        on_finish runs once the decode thread has exited, even if the consumer
+        was cancelled earlier, so callers can release the model there.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        stop = threading.Event()
+
+        def _produce() -> None:
+            try:
+                target_prefix = [self.tokenizer.get_lang_token(target_lang)]
+                paragraphs = self._split_documents([text])[0]
+                for p_idx, para in enumerate(paragraphs):
+                    if p_idx:
+                        loop.call_soon_threadsafe(queue.put_nowait, "\n")
+                    for s_idx, sentence in enumerate(para):
+                        if s_idx:
+                            loop.call_soon_threadsafe(queue.put_nowait, " ")
+                        tokens: list[str] = []
+                        emitted = ""
+                        for step in self.translator.generate_tokens(
+                            self._encode(sentence, source_lang), target_prefix=target_prefix
+                        ):
+                            if stop.is_set():
+                                return
+                            tokens.append(step.token)
+                            # Re-decode the prefix so SentencePiece spacing comes out right.
+                            decoded = self._decode(tokens)
+                            if len(decoded) > len(emitted):
+                                loop.call_soon_threadsafe(queue.put_nowait, decoded[len(emitted):])
+                                emitted = decoded
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                on_finish()
+
+        producer = asyncio.ensure_future(asyncio.to_thread(_produce))
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Client went away or we're done: let the decode thread bail out early.
+            # Shielded so a cancelled consumer doesn't cancel the thread's task;
+            # the thread itself calls on_finish when it's really done.
+            stop.set()
+            await asyncio.shield(producer)
+
+
+# Run the EasyNMT (non-CTranslate2) fallback in half precision on GPU.
+EASYNMT_FP16 = os.getenv("EASYNMT_FP16", "0") == "1"
+
+# fastText language identification (compact quantised lid.176 model, ~1 MB).
+LID_MODEL_PATH = os.getenv("LID_MODEL_PATH", os.path.join("models", "lid.176.ftz"))
+LID_MODEL_URL = "https://dl.fbaipublicfiles.com/fasttext/supervised-models/lid.176.ftz"
+# Predictions below this probability are treated as "unknown".
+LID_MIN_CONFIDENCE = 0.3
+
+# Cheap pre-check so obvious English input never reaches the detector.
+_ENGLISH_STOPWORDS_RE = re.compile(rb"\b(the|and|is|of|to|a|in|that|it)\b", re.I)
+# Words that also occur in other Latin-script languages (e.g. Dutch "is", "in").
+_AMBIGUOUS_STOPWORDS = {b"a", b"in", b"is", b"it", b"to"}
+
+# Bounded LRU of finished translations for repeated payloads (retries, probes, ...).
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "4096"))
+TranslationKey = tuple[str, str, str, str]  # (model_name, source_lang, target_lang, text digest)
+_TRANSLATION_CACHE: OrderedDict[TranslationKey, str] = OrderedDict()
+
+# Optional Redis cache shared by all workers/replicas, behind the in-process one.
+# Only texts of at least REDIS_CACHE_MIN_BYTES go there; short ones stay local.
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS_CACHE_MIN_BYTES = int(os.getenv("REDIS_CACHE_MIN_BYTES", "2048"))
+REDIS_CACHE_TTL_SECONDS = int(os.getenv("REDIS_CACHE_TTL_SECONDS", "86400"))
+# Kept short so an unreachable or stalled Redis degrades to cache misses
+# instead of holding every large request until the OS TCP timeout.
+REDIS_TIMEOUT_SECONDS = float(os.getenv("REDIS_TIMEOUT_MS", "200")) / 1000
+_REDIS: aioredis.Redis | None = None
+
+# Strong refs to fire-and-forget tasks so they aren't garbage-collected mid-run.
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
 
 # Cache models on first use instead of loading everything at import time.
-_MODEL_CACHE: dict[str, EasyNMT] = {}
+# The cache is per process: with several Uvicorn workers each holds its own copy.
+# At most MAX_RESIDENT_MODELS stay on the device (LRU order); older idle ones are
+# parked in host RAM so switching back doesn't rebuild them from disk.
+MAX_RESIDENT_MODELS = max(1, int(os.getenv("MAX_RESIDENT_MODELS", "1")))
+_MODEL_CACHE: OrderedDict[str, CT2Model | EasyNMT] = OrderedDict()
+_OFFLOADED_MODELS: dict[str, CT2Model | EasyNMT] = {}
+# Host copies of GPU-resident EasyNMT weights. Inference never changes them, so
+# offloading just points the module back at these instead of copying off the GPU.
+_CPU_STATE_DICTS: dict[str, dict[str, torch.Tensor]] = {}
+# Guards the tables above and the in-use counts; only held for bookkeeping, so
+# requests for resident models never wait behind a load.
+_MODEL_LOCK = threading.Lock()
+# Serialises loads/swaps so a warm-up and a request never load the same model
+# twice. Held while weights are read or moved, never by cache hits.
+_LOAD_LOCK = threading.Lock()
+# Batches currently running per model; a model is only offloaded once its count
+# drains to zero, signalled through _MODEL_RELEASED.
+_MODEL_IN_USE: Counter[str] = Counter()
+_MODEL_RELEASED = threading.Condition(_MODEL_LOCK)
 
 def ensure_nltk() -> None:
     """
@@ -46,114 +360,648 @@ def ensure_nltk() -> None:
         LOG.info("NLTK resource 'punkt_tab' missing; downloading now...")
         nltk.download("punkt_tab", download_dir=nltk_data_dir or None, quiet=True)
 
-def get_model(model_name: str) -> EasyNMT:
+def ensure_lid_model() -> fasttext.FastText._FastText:
     """
-    Lazy-load and cache EasyNMT models to reduce startup time and memory/VRAM usage.
+    Load the fastText language-ID model, downloading it first if it's missing
+    (the Docker image ships it; local runs fetch it once).
+    """
+    if not os.path.isfile(LID_MODEL_PATH):
+        LOG.info("fastText model '%s' missing; downloading now...", LID_MODEL_PATH)
+        model_dir = os.path.dirname(LID_MODEL_PATH) or "."
+        os.makedirs(model_dir, exist_ok=True)
+        # Every Gunicorn worker runs this at import: download to a temp file in the
+        # same directory and rename, so nobody ever loads a half-written model.
+        fd, tmp_path = tempfile.mkstemp(dir=model_dir, suffix=".part")
+        os.close(fd)
+        try:
+            urllib.request.urlretrieve(LID_MODEL_URL, tmp_path)
+            os.replace(tmp_path, LID_MODEL_PATH)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return fasttext.load_model(LID_MODEL_PATH)
+
+def looks_like_english(text: str) -> bool:
+    """
+    True for text that is (almost) pure ASCII and contains at least two distinct
+    English stopwords, at least one of which isn't shared with e.g. Dutch.
+    """
+    ascii_bytes = text.encode("ascii", errors="ignore")
+    if len(ascii_bytes) / max(1, len(text.encode("utf-8"))) <= 0.98:
+        return False
+    hits = {m.lower() for m in _ENGLISH_STOPWORDS_RE.findall(ascii_bytes)}
+    return len(hits) >= 2 and not hits <= _AMBIGUOUS_STOPWORDS
+
+@lru_cache(maxsize=4096)
+def detect_cached(text: str) -> str | None:
     """
+    fastText language ID, memoised for repeated inputs. None when unsure.
+    """
+    try:
+        # The low-level binding skips the wrapper's np.array(..., copy=False), which
+        # raises under NumPy 2. It still rejects newlines, so flatten the text first.
+        predictions = LID_MODEL.f.predict(text.replace("\n", " "), 1, 0.0, "strict")
+    except Exception:
+        LOG.warning("fastText language detection raised", exc_info=True)
+        return None
+    if predictions and predictions[0][0] >= LID_MIN_CONFIDENCE:
+        return predictions[0][1][len("__label__"):]
+    return None
+
+def detect_language(text: str) -> str | None:
+    """
+    Single entry point for source-language detection. None means "unknown":
+    very short strings aren't worth detecting, obvious English skips the
+    detector, everything else goes through the memoised fastText call.
+    """
+    if len(text) < 3:
+        return None
+    if looks_like_english(text):
+        return "en"
+    # fastText can be unsure on short/noisy strings; that also yields None.
+    return detect_cached(text)
+
+def translation_cache_key(model_name: str, source_lang: str, target_lang: str, text: str) -> TranslationKey:
+    # 128-bit blake2b: fast, and collisions are not a practical concern.
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    return (model_name, source_lang, target_lang, digest)
+
+def translation_cache_get(key: TranslationKey) -> str | None:
+    out = _TRANSLATION_CACHE.get(key)
+    if out is not None:
+        _TRANSLATION_CACHE.move_to_end(key)
+    return out
+
+def translation_cache_put(key: TranslationKey, out: str) -> None:
+    _TRANSLATION_CACHE[key] = out
+    _TRANSLATION_CACHE.move_to_end(key)
+    while len(_TRANSLATION_CACHE) > TRANSLATION_CACHE_SIZE:
+        _TRANSLATION_CACHE.popitem(last=False)
+
+def _uses_shared_cache(text: str) -> bool:
+    return _REDIS is not None and len(text.encode("utf-8")) >= REDIS_CACHE_MIN_BYTES
+
+def _redis_key(key: TranslationKey) -> str:
+    return "translate:" + ":".join(key)
+
+async def cached_translation(key: TranslationKey, text: str) -> str | None:
+    """
+    In-process LRU first, then the shared Redis cache (a Redis hit also fills
+    the local one). Redis errors are logged and treated as misses.
+    """
+    out = translation_cache_get(key)
+    if out is not None or not _uses_shared_cache(text):
+        return out
+    try:
+        value = await _REDIS.get(_redis_key(key))
+    except RedisError as e:
+        LOG.warning("Redis cache lookup failed: %s", e)
+        return None
+    if value is None:
+        return None
+    out = value.decode("utf-8")
+    translation_cache_put(key, out)
+    return out
+
+def spawn_background(coro) -> None:
+    task = asyncio.create_task(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+async def _redis_store(key: TranslationKey, out: str) -> None:
+    try:
+        await _REDIS.set(_redis_key(key), out, ex=REDIS_CACHE_TTL_SECONDS)
+    except RedisError as e:
+        LOG.warning("Redis cache store failed: %s", e)
+
+def store_translation(key: TranslationKey, text: str, out: str) -> None:
+    translation_cache_put(key, out)
+    if _uses_shared_cache(text):
+        # Fire-and-forget: the response shouldn't wait on a Redis round trip.
+        spawn_background(_redis_store(key, out))
+
+def check_model_name(model_name: str) -> None:
     if model_name not in MODEL_NAMES:
         raise HTTPException(
             status_code=400,
-            detail=f"Unknown model '{model_name}'. Available: {', '.join(sorted(MODEL_NAMES))}",
+            detail=f"Unknown model '{model_name}'. Available: {_MODEL_LIST_STR}",
         )
 
-    cached = _MODEL_CACHE.get(model_name)
-    if cached is not None:
-        return cached
+def check_languages(source_lang: str, target_lang: str) -> None:
+    # Rejecting unknown codes up front also keeps the scheduler's per-pair queues bounded.
+    for field, lang in (("source_lang", source_lang), ("target_lang", target_lang)):
+        if lang not in SUPPORTED_LANGS:
+            raise HTTPException(status_code=400, detail=f"Unsupported {field} '{lang}'")
+
+def choose_model_name(requested: str | None, text: str) -> str:
+    if requested:
+        return requested.strip()
+    # Only when both models can stay resident: with a single slot, mixed
+    # short/long traffic would swap models on nearly every batch.
+    if FAST_MODEL_AVAILABLE and MAX_RESIDENT_MODELS > 1 and len(text) <= FAST_MODEL_MAX_CHARS:
+        return FAST_MODEL_NAME
+    return DEFAULT_MODEL_NAME
 
-    LOG.info("Loading EasyNMT model: %s", model_name)
-    # Use CUDA if available; EasyNMT will fall back to CPU if not.
-    m = EasyNMT(model_name, device="cuda")
-    _MODEL_CACHE[model_name] = m
+def get_model(model_name: str) -> CT2Model | EasyNMT:
+    """
+    Lazy-load and cache models to reduce startup time and memory/VRAM usage.
+    Uses the converted CTranslate2 model when present, otherwise plain EasyNMT.
+    """
+    check_model_name(model_name)
+    return _get_resident_model(model_name, in_use=False)
+
+def acquire_model(model_name: str) -> CT2Model | EasyNMT:
+    """
+    Like get_model, but marks the model as in use until release_model() is called.
+    """
+    check_model_name(model_name)
+    return _get_resident_model(model_name, in_use=True)
+
+def try_acquire_resident_model(model_name: str) -> CT2Model | EasyNMT | None:
+    """
+    Non-loading acquire_model for the event loop: None if the model isn't resident.
+    """
+    with _MODEL_LOCK:
+        return _take_cached_model(model_name, in_use=True)
+
+def release_model(model_name: str) -> None:
+    with _MODEL_LOCK:
+        _MODEL_IN_USE[model_name] -= 1
+        if _MODEL_IN_USE[model_name] == 0:
+            _MODEL_RELEASED.notify_all()
+
+def _take_cached_model(model_name: str, in_use: bool) -> CT2Model | EasyNMT | None:
+    # Caller holds _MODEL_LOCK.
+    m = _MODEL_CACHE.get(model_name)
+    if m is not None:
+        _MODEL_CACHE.move_to_end(model_name)
+        if in_use:
+            _MODEL_IN_USE[model_name] += 1
     return m
 
-app = FastAPI()
+def _get_resident_model(model_name: str, in_use: bool) -> CT2Model | EasyNMT:
+    with _MODEL_LOCK:
+        m = _take_cached_model(model_name, in_use)
+    if m is not None:
+        return m
+
+    with _LOAD_LOCK:
+        # Another thread may have published it while we waited for the load lock.
+        with _MODEL_LOCK:
+            m = _take_cached_model(model_name, in_use)
+        if m is not None:
+            return m
+
+        # Make room first so the old and new weights never share the device.
+        _evict_idle_models(limit=MAX_RESIDENT_MODELS - 1)
+        m = _OFFLOADED_MODELS.pop(model_name, None)
+        if m is not None:
+            LOG.info("Re-activating offloaded model: %s", model_name)
+            activate_model(model_name, m)
+        else:
+            m = _load_model(model_name)
+        with _MODEL_LOCK:
+            _MODEL_CACHE[model_name] = m
+            if in_use:
+                _MODEL_IN_USE[model_name] += 1
+        return m
+
+def _evict_idle_models(limit: int) -> None:
+    # Caller holds _LOAD_LOCK (which also guards _OFFLOADED_MODELS). Idle models
+    # go first, oldest first; otherwise the oldest busy one is unpublished and
+    # its running batches are waited out, so the cap is never exceeded.
+    while True:
+        with _MODEL_LOCK:
+            if len(_MODEL_CACHE) <= limit:
+                return
+            name = next((n for n in _MODEL_CACHE if _MODEL_IN_USE[n] == 0), next(iter(_MODEL_CACHE)))
+            # Unpublished first, so no new batch can pick it up meanwhile.
+            m = _MODEL_CACHE.pop(name)
+            if _MODEL_IN_USE[name] > 0:
+                LOG.info("Waiting for model %s to go idle before offloading it", name)
+            _MODEL_RELEASED.wait_for(lambda: _MODEL_IN_USE[name] == 0)
+        LOG.info("Offloading model %s to host memory (MAX_RESIDENT_MODELS=%d)", name, MAX_RESIDENT_MODELS)
+        deactivate_model(name, m)
+        _OFFLOADED_MODELS[name] = m
+
+def snapshot_state_dict(model: torch.nn.Module) -> dict[str, torch.Tensor]:
+    """
+    Pinned (page-locked) host copy of a CUDA model's state dict, so swapping it
+    back in can use async DMA. Tied weights (m2m_100 shares its embeddings with
+    the encoder, decoder and LM head) are copied once and stay shared.
+    """
+    copies: dict[tuple, torch.Tensor] = {}
+    out: dict[str, torch.Tensor] = {}
+    for key, value in model.state_dict().items():
+        ident = (value.data_ptr(), value.shape, value.dtype)
+        if ident not in copies:
+            host = torch.empty(value.shape, dtype=value.dtype, pin_memory=True)
+            host.copy_(value.detach())
+            copies[ident] = host
+        out[key] = copies[ident]
+    return out
+
+_COPY_STREAM: torch.cuda.Stream | None = None
+
+def _copy_stream() -> torch.cuda.Stream:
+    # Dedicated stream for host->device weight uploads (created lazily, per process).
+    global _COPY_STREAM
+    if _COPY_STREAM is None:
+        _COPY_STREAM = torch.cuda.Stream()
+    return _COPY_STREAM
+
+def activate_model(model_name: str, m: CT2Model | EasyNMT) -> None:
+    if isinstance(m, CT2Model):
+        m.translator.load_model()
+        return
+
+    cpu_sd = _CPU_STATE_DICTS.get(model_name)
+    if cpu_sd is None:
+        m.translator.model.to(m.device)
+        return
+    # Queue one async upload per distinct pinned host tensor on the copy stream,
+    # then swap the device tensors in without waiting for the copies on the host.
+    stream = _copy_stream()
+    compute_stream = torch.cuda.current_stream()
+    copies: dict[int, torch.Tensor] = {}
+    device_sd: dict[str, torch.Tensor] = {}
+    with torch.cuda.stream(stream):
+        for key, value in cpu_sd.items():
+            if id(value) not in copies:
+                device_value = value.to(m.device, non_blocking=True)
+                # Allocated on the copy stream but consumed on the compute stream.
+                device_value.record_stream(compute_stream)
+                copies[id(value)] = device_value
+            device_sd[key] = copies[id(value)]
+    m.translator.model.load_state_dict(device_sd, assign=True)
+    # GPU-side ordering only: kernels queued later (the next translation) start
+    # once the uploads land, while this thread returns immediately.
+    compute_stream.wait_stream(stream)
+
+def deactivate_model(model_name: str, m: CT2Model | EasyNMT) -> None:
+    if isinstance(m, CT2Model):
+        m.translator.unload_model(to_cpu=True)
+    elif model_name in _CPU_STATE_DICTS:
+        # No device->host copy: rebind the parameters to the existing host snapshot.
+        m.translator.model.load_state_dict(_CPU_STATE_DICTS[model_name], assign=True)
+    else:
+        m.translator.model.to("cpu")
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+def _load_model(model_name: str) -> CT2Model | EasyNMT:
+    model_dir = MODEL_NAMES[model_name]
+    if not os.path.isdir(model_dir):
+        if model_name not in EASYNMT_MODELS:
+            raise HTTPException(status_code=503, detail=f"Model '{model_name}' is not installed")
+        LOG.warning("No CTranslate2 model at %s; falling back to EasyNMT", model_dir)
+        LOG.info("Loading EasyNMT model: %s", model_name)
+        # Use CUDA if available, CPU otherwise.
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        m = EasyNMT(model_name, device=device)
+        if EASYNMT_FP16 and device == "cuda":
+            # Native BF16 on Ampere+ (FP32 exponent range), FP16 otherwise (emulated BF16
+            # on Turing/Volta would be slower than FP16). Inputs are token
+            # ids, so only the weights need converting; activations follow them.
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported(including_emulation=False) else torch.float16
+            LOG.info("Casting EasyNMT model %s to %s", model_name, dtype)
+            m.translator.model.to(dtype)
+        # EasyNMT otherwise moves the weights on first translate; do it now so the
+        # model is resident straight after a warm-up.
+        m.translator.model.to(device)
+        if device == "cuda":
+            # Snapshot once (after any dtype cast) so later swaps skip the copy back.
+            _CPU_STATE_DICTS[model_name] = snapshot_state_dict(m.translator.model)
+        return m
+
+    # INT8 weights everywhere; keep FP16 activations when a GPU is available.
+    if ctranslate2.get_cuda_device_count() > 0:
+        device, compute_type = "cuda", "int8_float16"
+    else:
+        device, compute_type = "cpu", "int8"
+
+    LOG.info(
+        "Loading CTranslate2 model: %s (%s, %s, CUDA_VISIBLE_DEVICES=%s)",
+        model_name,
+        device,
+        compute_type,
+        os.getenv("CUDA_VISIBLE_DEVICES", "<all>"),
+    )
+    translator = ctranslate2.Translator(
+        model_dir,
+        device=device,
+        compute_type=compute_type,
+        inter_threads=1,
+        intra_threads=CT2_INTRA_THREADS,
+    )
+    # The converter copies the HF tokenizer files next to the CT2 weights.
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return CT2Model(translator, tokenizer)
+
+# Requests that arrive within MAX_WAIT_MS of each other are batched together,
+# split into length buckets so short texts don't pay for a long one's padding.
+MAX_BATCH_PER_BUCKET = int(os.getenv("MAX_BATCH_PER_BUCKET", "32"))
+MAX_WAIT_SECONDS = float(os.getenv("MAX_WAIT_MS", "10")) / 1000
+# Per-pair workers that see no traffic for this long exit and drop their queue.
+WORKER_IDLE_SECONDS = float(os.getenv("BATCH_WORKER_IDLE_SECONDS", "300"))
+# Exclusive upper bounds (approximate tokens) of all but the last bucket.
+LENGTH_BUCKETS = (16, 64, 256)
+MAX_BATCH = MAX_BATCH_PER_BUCKET * (len(LENGTH_BUCKETS) + 1)
+
+BatchKey = tuple[str, str, str]  # (model_name, source_lang, target_lang)
+BatchItem = tuple[str, asyncio.Future]
+
+def bucket_by_length(batch: list[BatchItem]) -> list[list[BatchItem]]:
+    """
+    Sort by approximate token length (whitespace words) and split into
+    LENGTH_BUCKETS, each capped at MAX_BATCH_PER_BUCKET items. Shortest first.
+    """
+    buckets: list[list[BatchItem]] = [[] for _ in range(len(LENGTH_BUCKETS) + 1)]
+    lengths = [len(text.split()) for text, _ in batch]
+    for length, item in sorted(zip(lengths, batch), key=lambda pair: pair[0]):
+        buckets[bisect.bisect_right(LENGTH_BUCKETS, length)].append(item)
+    return [
+        bucket[i:i + MAX_BATCH_PER_BUCKET]
+        for bucket in buckets
+        for i in range(0, len(bucket), MAX_BATCH_PER_BUCKET)
+    ]
+
+class BatchScheduler:
+    """
+    Micro-batcher in front of the models: concurrent requests for the same
+    (model, source_lang, target_lang) are coalesced into a single translate call.
+    """
+
+    def __init__(self) -> None:
+        self._queues: dict[BatchKey, asyncio.Queue[BatchItem]] = {}
+        self._workers: dict[BatchKey, asyncio.Task] = {}
+        # Prepares CT2 batches and waits on their results; CT2 does the heavy
+        # lifting on its own threads, so two are plenty.
+        self._ct2_executor: ThreadPoolExecutor | None = None
+        self._running = False
+
+    def start(self) -> None:
+        self._ct2_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ct2-batches")
+        self._running = True
+
+    async def stop(self) -> None:
+        self._running = False
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+        if self._ct2_executor is not None:
+            self._ct2_executor.shutdown(wait=False, cancel_futures=True)
+            self._ct2_executor = None
+
+    def submit(self, model_name: str, source_lang: str, target_lang: str, text: str) -> asyncio.Future:
+        if not self._running:
+            raise RuntimeError("BatchScheduler is not running")
+
+        key = (model_name, source_lang, target_lang)
+        queue = self._queues.get(key)
+        if queue is None:
+            # One queue + worker per language pair/model, created on first use.
+            queue = self._queues[key] = asyncio.Queue()
+            self._workers[key] = asyncio.create_task(self._worker(key, queue))
+
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((text, future))
+        return future
+
+    @staticmethod
+    async def _drain_more(queue: asyncio.Queue[BatchItem], batch: list[BatchItem]) -> None:
+        while len(batch) < MAX_BATCH:
+            batch.append(await queue.get())
+
+    async def _worker(self, key: BatchKey, queue: asyncio.Queue[BatchItem]) -> None:
+        while True:
+            try:
+                first = await asyncio.wait_for(queue.get(), timeout=WORKER_IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                # No await between the check and the removal, so submit() can't
+                # slip an item into a queue that is being dropped.
+                if queue.empty():
+                    del self._queues[key]
+                    del self._workers[key]
+                    return
+                continue
+            batch = [first]
+            try:
+                await asyncio.wait_for(self._drain_more(queue, batch), timeout=MAX_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+            # Skip callers that already went away (client disconnects cancel the future).
+            batch = [(text, fut) for text, fut in batch if not fut.done()]
+            for bucket in bucket_by_length(batch):
+                await self._dispatch(key, bucket)
+
+    @staticmethod
+    def _fail(batch: list[BatchItem], exc: Exception) -> None:
+        for _, fut in batch:
+            if not fut.done():
+                fut.set_exception(exc)
+
+    async def _dispatch(self, key: BatchKey, batch: list[BatchItem]) -> None:
+        model_name, source_lang, target_lang = key
+        texts = [text for text, _ in batch]
+        try:
+            model = try_acquire_resident_model(model_name) or await run_in_threadpool(acquire_model, model_name)
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        try:
+            if isinstance(model, CT2Model):
+                outs = await model.translate_async(
+                    texts,
+                    source_lang=source_lang,
+                    target_lang=target_lang,
+                    executor=self._ct2_executor,
+                    beam_size=1,
+                    batch_size=MAX_BATCH_PER_BUCKET,
+                )
+            else:
+                outs = await run_in_threadpool(
+                    model.translate,
+                    texts,
+                    source_lang=source_lang,
+                    target_lang=target_lang,
+                    beam_size=1,
+                    batch_size=MAX_BATCH_PER_BUCKET,
+                )
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        finally:
+            release_model(model_name)
+
+        for (_, fut), out in zip(batch, outs):
+            if not fut.done():
+                fut.set_result(out)
+
+scheduler = BatchScheduler()
+
+async def _warm_model(model_name: str) -> None:
+    try:
+        await asyncio.to_thread(get_model, model_name)
+        LOG.info("Model %s is warm", model_name)
+    except Exception:
+        LOG.exception("Warm-up of model %s failed", model_name)
+
+def schedule_warmup(model_name: str) -> None:
+    spawn_background(_warm_model(model_name))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    LOG.info(
+        "Threads: OMP_NUM_THREADS=%s MKL_NUM_THREADS=%s TOKENIZERS_PARALLELISM=%s "
+        "CT2 intra_threads=%d torch threads=%d (physical cores=%d, workers=%d)",
+        os.environ["OMP_NUM_THREADS"],
+        os.environ["MKL_NUM_THREADS"],
+        os.environ["TOKENIZERS_PARALLELISM"],
+        CT2_INTRA_THREADS,
+        torch.get_num_threads(),
+        physical_cores(),
+        WEB_CONCURRENCY,
+    )
+    global _REDIS
+    if REDIS_URL:
+        _REDIS = aioredis.Redis.from_url(
+            REDIS_URL,
+            socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+            socket_timeout=REDIS_TIMEOUT_SECONDS,
+        )
+        LOG.info("Shared translation cache enabled (texts >= %d bytes)", REDIS_CACHE_MIN_BYTES)
+    scheduler.start()
+    # Load the default model in the background so the first request is hot.
+    schedule_warmup(DEFAULT_MODEL_NAME)
+    if FAST_MODEL_AVAILABLE and MAX_RESIDENT_MODELS > 1:
+        schedule_warmup(FAST_MODEL_NAME)
+    yield
+    await scheduler.stop()
+    if _REDIS is not None:
+        await _REDIS.aclose()
+        _REDIS = None
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 ensure_nltk()
+LID_MODEL = ensure_lid_model()
 
-class TranslateRequest(BaseModel):
+class TranslateRequest(msgspec.Struct, kw_only=True):
     text: str
     # Optional: if provided, we skip auto-detection
     source_lang: str | None = None
     # Optional: if not provided and source_lang != 'en', we default to 'en'
     target_lang: str | None = None
-    # Optional: choose a model (e.g. "m2m_100_418M", "m2m_100_1.2B")
+    # Optional: choose a model (e.g. "m2m_100_418M", "m2m_100_1.2B", "m2m_100_418M_20_2")
     model: str | None = None
+    # Optional: set to false to drop started_at/finished_at/duration_seconds from the response
+    include_timing: bool = True
 
-@app.post("/translate")
-async def translate(req: TranslateRequest):
-    # Decide which model to use
-    # Decide which model to use (lazy-load)
-    model_name = (req.model or DEFAULT_MODEL_NAME).strip()
-    chosen_model = get_model(model_name)
+async def parse_translate_request(request: Request) -> TranslateRequest:
+    # msgspec decodes + validates in C; much cheaper than Pydantic for this tiny schema.
+    try:
+        return msgspec.json.decode(await request.body(), type=TranslateRequest)
+    except msgspec.DecodeError as e:  # also covers msgspec.ValidationError
+        raise HTTPException(status_code=422, detail=str(e))
 
-    # Start from any explicit source/target in the request
-    source_lang = req.source_lang.lower() if req.source_lang else None
-    target_lang = req.target_lang.lower() if req.target_lang else None
+NO_TRANSLATION_NOTE = "Source language is English and no target_lang was provided; no translation performed."
+
+# Fixed-shape bodies for include_timing=false; orjson serialises slotted
+# dataclasses natively, without building a dict per request.
+@dataclass(slots=True)
+class UntimedTranslation:
+    translation: str
+    model: str
+    source_lang: str
+    target_lang: str
+
+@dataclass(slots=True)
+class UntimedPassthrough(UntimedTranslation):
+    note: str = NO_TRANSLATION_NOTE
+
+def resolve_languages(req: TranslateRequest) -> tuple[str, str | None]:
+    """
+    Work out (source_lang, target_lang) for a request. target_lang is None when
+    the text is English and no target was asked for, i.e. there is nothing to do.
+    """
+    # Start from any explicit source/target in the request ("" -> None)
+    source_lang = (req.source_lang or "").lower() or None
+    target_lang = (req.target_lang or "").lower() or None
 
     # Case A: both source and target are provided -> trust the caller
     if source_lang and target_lang:
-        pass
-    else:
-        # Case B: at least one of source/target is missing -> auto-detect source if needed
-        if not source_lang:
-            detected_lang: str | None = None
-            try:
-                # langdetect can be flaky on very short/noisy strings; still try, but don't fail hard.
-                detected_lang = detect(req.text)
-            except LangDetectException:
-                LOG.warning("Language detection failed; defaulting source_lang to 'en'")
-
-            source_lang = (detected_lang or "en").lower()
-            LOG.info("Auto-detected source language: %s", source_lang)
-
-        # Decide target:
-        if not target_lang:
-            # If source is not English, default target to English
-            if source_lang != "en":
-                target_lang = "en"
-            else:
-                # Source is English and no explicit target -> no translation
-                started_at = datetime.now().isoformat()
-                finished_at = started_at
-                duration_seconds = 0.0
-
-                LOG.info(
-                    "Text is English and no target_lang provided; "
-                    "returning original text without translation."
-                )
+        return source_lang, target_lang
+
+    # Case B: at least one of source/target is missing -> auto-detect source if needed
+    if not source_lang:
+        detected_lang = detect_language(req.text)
+        if not detected_lang:
+            LOG.warning("Language detection failed; defaulting source_lang to 'en'")
+
+        source_lang = detected_lang or "en"
+        LOG.info("Auto-detected source language: %s", source_lang)
 
-                return {
-                    "translation": req.text,
-                    "model": model_name,
-                    "source_lang": source_lang,
-                    "target_lang": source_lang,
-                    "started_at": started_at,
-                    "finished_at": finished_at,
-                    "duration_seconds": duration_seconds,
-                    "note": "Source language is English and no target_lang was provided; no translation performed.",
-                }
+    # Decide target: if source is not English, default target to English
+    if not target_lang and source_lang != "en":
+        target_lang = "en"
+    return source_lang, target_lang
+
+@app.post("/translate")
+async def translate(req: TranslateRequest = Depends(parse_translate_request)):
+    # Decide which model to use (lazy-loaded by the batch scheduler)
+    model_name = choose_model_name(req.model, req.text)
+    check_model_name(model_name)
+
+    source_lang, target_lang = resolve_languages(req)
+    if target_lang is None:
+        # Source is English and no explicit target -> no translation.
+        # Nothing is timed here: one timestamp serves as both start and
+        # finish, and the duration is zero by definition.
+        LOG.info(
+            "Text is English and no target_lang provided; "
+            "returning original text without translation."
+        )
+
+        if not req.include_timing:
+            return ORJSONResponse(UntimedPassthrough(req.text, model_name, source_lang, source_lang))
+        now = datetime.now(_UTC)
+        return ORJSONResponse({
+            "translation": req.text,
+            "model": model_name,
+            "source_lang": source_lang,
+            "target_lang": source_lang,
+            "started_at": now,
+            "finished_at": now,
+            "duration_seconds": 0.0,
+            "note": NO_TRANSLATION_NOTE,
+        })
 
     # 3. Timing + translation using the *computed* languages
-    started_at = datetime.now(timezone.utc).isoformat()
+    # datetimes are left as-is: orjson encodes them natively (RFC 3339)
+    started_at = datetime.now(_UTC) if req.include_timing else None
     t0 = time.perf_counter()
 
-    try:
-        def _do_translate() -> str:
-            return chosen_model.translate(
-                req.text,
-                source_lang=source_lang,
-                target_lang=target_lang,
-                beam_size=1,
-            )
-
-        out = await run_in_threadpool(_do_translate)
-    except Exception as e:
-        LOG.exception("Translation failed")
-        raise HTTPException(status_code=500, detail=f"Translation failed: {e}")
+    check_languages(source_lang, target_lang)
+    cache_key = translation_cache_key(model_name, source_lang, target_lang, req.text)
+    out = await cached_translation(cache_key, req.text)
+    if out is None:
+        try:
+            future = scheduler.submit(model_name, source_lang, target_lang, req.text)
+            out = await future
+        except HTTPException:
+            raise
+        except Exception as e:
+            LOG.exception("Translation failed")
+            raise HTTPException(status_code=500, detail=f"Translation failed: {e}")
+        store_translation(cache_key, req.text, out)
 
     # End timing
     t1 = time.perf_counter()
-    finished_at = datetime.now(timezone.utc).isoformat()
     duration_seconds = t1 - t0
 
     # Log to console
@@ -165,17 +1013,134 @@ async def translate(req: TranslateRequest):
         duration_seconds,
     )
 
-    return {
+    # Returned directly so FastAPI's jsonable_encoder pass is skipped as well.
+    if not req.include_timing:
+        return ORJSONResponse(UntimedTranslation(out, model_name, source_lang, target_lang))
+    return ORJSONResponse({
         "translation": out,
         "model": model_name,
         "source_lang": source_lang,
         "target_lang": target_lang,
         "started_at": started_at,
-        "finished_at": finished_at,
+        "finished_at": datetime.now(_UTC),
         "duration_seconds": duration_seconds,
-    }
+    })
+
+def sse_event(data: dict, event: str | None = None) -> bytes:
+    # JSON keeps newlines inside translated text from breaking SSE framing.
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + orjson.dumps(data) + b"\n\n"
+
+async def _acquire_model_for_stream(model_name: str) -> CT2Model | EasyNMT:
+    # A disconnect while the model loads must not leak the in-use mark taken
+    # by the worker thread: release it when that thread eventually finishes.
+    acquiring = asyncio.ensure_future(run_in_threadpool(acquire_model, model_name))
+    try:
+        return await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        def _release_if_acquired(task: asyncio.Future) -> None:
+            if not task.cancelled() and task.exception() is None:
+                release_model(model_name)
+
+        acquiring.add_done_callback(_release_if_acquired)
+        raise
+
+async def _stream_translation(
+    req: TranslateRequest, model_name: str, source_lang: str, target_lang: str
+) -> AsyncIterator[bytes]:
+    t0 = time.perf_counter()
+    cache_key = translation_cache_key(model_name, source_lang, target_lang, req.text)
+    out = await cached_translation(cache_key, req.text)
+    try:
+        if out is not None:
+            yield sse_event({"text": out})
+        else:
+            model = await _acquire_model_for_stream(model_name)
+            if isinstance(model, CT2Model):
+                # The decode thread releases the model itself once it stops using it,
+                # which can be after this generator is cancelled by a disconnect.
+                pieces: list[str] = []
+                async for piece in model.translate_stream(
+                    req.text, source_lang, target_lang, on_finish=partial(release_model, model_name)
+                ):
+                    pieces.append(piece)
+                    yield sse_event({"text": piece})
+                out = "".join(pieces)
+            else:
+                try:
+                    # EasyNMT can't stream tokens; send the whole translation as one event.
+                    out = (await run_in_threadpool(
+                        model.translate,
+                        [req.text],
+                        source_lang=source_lang,
+                        target_lang=target_lang,
+                        beam_size=1,
+                    ))[0]
+                finally:
+                    release_model(model_name)
+                yield sse_event({"text": out})
+            store_translation(cache_key, req.text, out)
+    except Exception as e:
+        LOG.exception("Streaming translation failed")
+        detail = e.detail if isinstance(e, HTTPException) else f"Translation failed: {e}"
+        yield sse_event({"detail": detail}, event="error")
+        return
+
+    duration_seconds = time.perf_counter() - t0
+    LOG.info(
+        "Streamed translation %s -> %s using %s took %.3f seconds",
+        source_lang,
+        target_lang,
+        model_name,
+        duration_seconds,
+    )
+    done = {"model": model_name, "source_lang": source_lang, "target_lang": target_lang}
+    if req.include_timing:
+        done["duration_seconds"] = duration_seconds
+    yield sse_event(done, event="done")
+
+@app.post("/translate/stream")
+async def translate_stream(req: TranslateRequest = Depends(parse_translate_request)):
+    """
+    Server-Sent Events version of /translate: "data" events carry text pieces to
+    append as they are decoded, then a final "done" (or "error") event.
+    """
+    model_name = choose_model_name(req.model, req.text)
+    check_model_name(model_name)
+    source_lang, target_lang = resolve_languages(req)
+
+    if target_lang is None:
+        async def _untranslated() -> AsyncIterator[bytes]:
+            yield sse_event({"text": req.text})
+            done = {
+                "model": model_name,
+                "source_lang": source_lang,
+                "target_lang": source_lang,
+                "note": NO_TRANSLATION_NOTE,
+            }
+            if req.include_timing:
+                done["duration_seconds"] = 0.0
+            yield sse_event(done, event="done")
+
+        return StreamingResponse(_untranslated(), media_type="text/event-stream")
+
+    check_languages(source_lang, target_lang)
+
+    return StreamingResponse(
+        _stream_translation(req, model_name, source_lang, target_lang),
+        media_type="text/event-stream",
+    )
+
+@app.post("/warmup", status_code=202)
+async def warmup(model: str = DEFAULT_MODEL_NAME):
+    # Lets ops pre-load a model (e.g. the 1.2B one) before a traffic spike.
+    # With MAX_RESIDENT_MODELS=1 this offloads whichever model is resident now.
+    model_name = model.strip()
+    check_model_name(model_name)
+    schedule_warmup(model_name)
+    return {"status": "warming", "model": model_name}
 
 @app.get("/")
 async def root():
     # Simple health check / sanity check endpoint
-    return {"status": "ok", "default_model": DEFAULT_MODEL_NAME, "loaded_models": sorted(_MODEL_CACHE.keys())}
+    return {"status": "ok", "default_model": DEFAULT_MODEL_NAME, "fast_model": FAST_MODEL_NAME if FAST_MODEL_AVAILABLE else None, "loaded_models": sorted(_MODEL_CACHE.keys()), "offloaded_models": sorted(_OFFLOADED_MODELS.keys())}